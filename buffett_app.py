@@ -1,12 +1,18 @@
 import os
 import requests
-from bs4 import BeautifulSoup
-from flask import Flask, jsonify, send_file, render_template, request
-from google import genai
-from google.genai import types
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import diskcache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, jsonify, send_file, render_template, request, stream_with_context
+from flask_compress import Compress
 import re
-import wave
-import uuid
+import threading
+import json
+import hashlib
+import time
+import bisect
 import logging
 from dotenv import load_dotenv
 
@@ -23,44 +29,196 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 
+# Compress page and JSON responses. Streamed summaries (text/event-stream) are
+# left alone: a compressor buffers output, which would hold back each event.
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json']
+app.config['COMPRESS_LEVEL'] = 5
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
 # Load your Gemini API key from environment
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GEMINI_API_KEY:
     logger.error("GOOGLE_API_KEY not found in environment variables")
     raise ValueError("GOOGLE_API_KEY environment variable is required")
 
-client = genai.Client(api_key=GEMINI_API_KEY)
+# google-genai is slow to import, so the client is created on first use
+_gemini_client = None
+_gemini_config = None
+_gemini_lock = threading.Lock()
 
 headers = {"User-Agent": "Matthew matthew@example.com"}
 
+# Shared keep-alive session so repeat SEC calls reuse the same TCP/TLS connection
+session = requests.Session()
+session.headers.update(headers)
+session.headers["Accept-Encoding"] = "gzip, deflate"
+session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+# google-re2 scans multi-MB filings in guaranteed linear time; fall back to
+# the stdlib engine where its wheels are unavailable
+try:
+    import re2
+except ImportError:
+    re2 = re
+
+# Every 10-K "Item N" heading the section extractor cares about, matched in a
+# single pass. Group 1 captures the item number; groups 2-6 capture the
+# section title (business, risk factors, MD&A, quantitative, financial) when a
+# heading starts at that position. The pattern is lower-case and runs
+# case-sensitively against text.lower(). Whitespace is spelled out as
+# Python's full str.isspace() set because re2's \s only covers ASCII.
+SECTION_WHITESPACE = "\\s\x0b\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+SECTION_MARKERS_SOURCE = (
+    f"item[{SECTION_WHITESPACE}]+(1a|1b|1|7a|7|8|9)"
+    f"(?:[.{SECTION_WHITESPACE}]+(?:(business)|(risk[{SECTION_WHITESPACE}]+factors)"
+    f"|(management|md&a)|(quantitative)|(financial)))?"
+)
+SECTION_MARKERS = re2.compile(SECTION_MARKERS_SOURCE)
+# Fallback for the rare text whose length changes when lower-cased
+SECTION_MARKERS_ANY_CASE = re2.compile("(?i)" + SECTION_MARKERS_SOURCE)
+
+# Page furniture that survives HTML stripping: explicit "Page N" and "F-N"
+# page labels and the "Table of Contents" back-links repeated on every page.
+# Bare numbers are kept, since table cells land on their own lines.
+BOILERPLATE_LINE = re.compile(
+    r"^[ \t]*(?:page[ \t]+\d{1,3}|f-\d{1,3}|table[ \t]+of[ \t]+contents)[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+HORIZONTAL_SPACE = re.compile(r"[ \t\xa0]+")
+BLANK_LINES = re.compile(r"\n\s*\n\s*\n+")
+
+# Elements whose own text is not part of the filing's readable content
+NON_TEXT_TAGS = {"head", "title", "script", "style"}
+
+# (section name, item number, SECTION_MARKERS title group, items that end the section)
+SECTIONS = [
+    ("Business", "1", 2, ("1a",)),
+    ("Risk Factors", "1a", 3, ("1b",)),
+    ("Management's Discussion and Analysis", "7", 4, ("7a", "8")),
+    ("Quantitative and Qualitative Disclosures", "7a", 5, ("8",)),
+    ("Financial Statements", "8", 6, ("9",)),
+]
+
+# On-disk cache for fetched filings, extracted sections and Gemini summaries
+cache = diskcache.Cache(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_buffett"),
+    size_limit=2 * 1024 ** 3,
+)
+
+def cache_key(*parts):
+    """Hash the given strings into a compact cache key."""
+    return hashlib.blake2b("|".join(parts).encode("utf-8", "ignore"), digest_size=16).hexdigest()
+
+# Thread pool for blocking I/O that runs off the request thread: SEC ticker
+# map refreshes and the parallel Gemini calls of the combined view
+executor = ThreadPoolExecutor(max_workers=16)
+
+# Ticker -> zero-padded CIK map built from company_tickers.json, refreshed
+# daily; after a failed download, retries wait TICKER_MAP_RETRY seconds
+TICKER_MAP_TTL = 24 * 60 * 60
+TICKER_MAP_RETRY = 5 * 60
+_ticker_map = {}
+_ticker_map_loaded_at = 0.0
+_ticker_map_failed_at = float("-inf")
+_ticker_map_lock = threading.Lock()
+_ticker_map_refresh = None
+
+def refresh_ticker_map():
+    """Download company_tickers.json and rebuild the ticker -> CIK map."""
+    global _ticker_map, _ticker_map_loaded_at, _ticker_map_failed_at
+    try:
+        url = "https://www.sec.gov/files/company_tickers.json"
+        data = session.get(url, timeout=10).json()
+        _ticker_map = {
+            entry["ticker"].upper(): str(entry["cik_str"]).zfill(10)
+            for entry in data.values()
+        }
+        _ticker_map_loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(_ticker_map)} tickers from SEC")
+    except Exception as e:
+        _ticker_map_failed_at = time.monotonic()
+        logger.error(f"Error loading SEC ticker map: {e}")
+        raise
+
+def schedule_ticker_map_refresh():
+    """Start a background ticker map refresh unless one is already running."""
+    global _ticker_map_refresh
+    with _ticker_map_lock:
+        if _ticker_map_refresh is None or _ticker_map_refresh.done():
+            _ticker_map_refresh = executor.submit(refresh_ticker_map)
+        return _ticker_map_refresh
+
+def load_ticker_map():
+    """
+    Return the cached ticker -> CIK map. Only the very first lookup waits on
+    the download; once loaded, a stale map is served while it refreshes in
+    the background. While a failed download is backing off, a stale map is
+    served as-is and an empty one raises instead of retrying.
+    """
+    now = time.monotonic()
+    if _ticker_map and now - _ticker_map_loaded_at <= TICKER_MAP_TTL:
+        return _ticker_map
+    if now - _ticker_map_failed_at < TICKER_MAP_RETRY:
+        if not _ticker_map:
+            raise RuntimeError("SEC ticker map unavailable, retrying later")
+        return _ticker_map
+    if not _ticker_map:
+        schedule_ticker_map_refresh().result()
+    else:
+        schedule_ticker_map_refresh()
+    return _ticker_map
+
 def get_cik(ticker):
     """Resolve ticker to CIK using SEC API."""
     try:
-        url = f"https://www.sec.gov/files/company_tickers.json"
-        data = requests.get(url, headers=headers, timeout=10).json()
-        for entry in data.values():
-            if entry["ticker"].lower() == ticker.lower():
-                logger.info(f"Found CIK for {ticker}")
-                return str(entry["cik_str"]).zfill(10)
+        cik = load_ticker_map().get(ticker.upper())
+        if cik:
+            logger.info(f"Found CIK for {ticker}")
+            return cik
         logger.warning(f"CIK not found for ticker: {ticker}")
         return None
     except Exception as e:
         logger.error(f"Error getting CIK for {ticker}: {e}")
         return None
 
+# A new 10-K can be filed at any time, so the latest-filing lookup is cached
+# in the shared disk cache for a day rather than for the life of the worker
+LATEST_10K_TTL = 24 * 60 * 60
+
+def _latest_10k_url(cik):
+    """
+    Look up the latest 10-K URL from the submissions API.
+    Errors propagate for get_latest_10k_url to handle.
+    """
+    url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+    data = session.get(url, timeout=10).json()
+    forms = data["filings"]["recent"]["form"]
+    for i, form in enumerate(forms):
+        if form == "10-K":
+            accession = data["filings"]["recent"]["accessionNumber"][i]
+            primary_doc = data["filings"]["recent"]["primaryDocument"][i]
+            return f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}/{primary_doc}"
+    return None
+
 def get_latest_10k_url(cik):
     """Fetch latest 10-K filing URL for a company."""
+    key = cache_key("latest-10k", cik)
+    archive_url = cache.get(key)
+    if archive_url is not None:
+        return archive_url
     try:
-        url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-        data = requests.get(url, headers=headers, timeout=10).json()
-        forms = data["filings"]["recent"]["form"]
-        for i, form in enumerate(forms):
-            if form == "10-K":
-                accession = data["filings"]["recent"]["accessionNumber"][i]
-                primary_doc = data["filings"]["recent"]["primaryDocument"][i]
-                archive_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}/{primary_doc}"
-                logger.info(f"Found 10-K URL for CIK {cik}")
-                return archive_url
+        archive_url = _latest_10k_url(cik)
+        if archive_url:
+            logger.info(f"Found 10-K URL for CIK {cik}")
+            # Misses aren't cached, so a first 10-K shows up on the next request
+            cache.set(key, archive_url, expire=LATEST_10K_TTL)
+            return archive_url
         logger.warning(f"No 10-K found for CIK: {cik}")
         return None
     except Exception as e:
@@ -69,142 +227,371 @@ def get_latest_10k_url(cik):
 
 def fetch_10k_text(url):
     """Fetch raw text from EDGAR 10-K filing URL."""
+    # Archive URLs embed the CIK and accession number, so a filing never changes
+    key = cache_key("10k", url)
+    text = cache.get(key)
+    if text is not None:
+        logger.info("Using cached 10-K content")
+        return text
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        # Stream the body and parse it incrementally rather than holding the
+        # full HTML, a decoded copy and a parse tree in memory at once
+        with session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            text = clean_10k_text(html_to_text(response.iter_content(chunk_size=65536)))
         logger.info(f"Successfully fetched 10-K content")
-        return soup.get_text(separator="\n")
+        if text:
+            cache.set(key, text)
+        return text
     except Exception as e:
         logger.error(f"Error fetching 10-K: {e}")
         return None
 
+def html_to_text(chunks):
+    """
+    Incrementally parse HTML byte chunks and return their text, one text node
+    per line. Finished elements are dropped as soon as their text is read, so
+    only the currently open tags stay in memory.
+    """
+    from lxml import etree
+
+    parser = etree.HTMLPullParser(events=("start", "end"), remove_comments=True, remove_pis=True)
+    out = []
+
+    def handle_events():
+        for event, el in parser.read_events():
+            if event == "start":
+                parent = el.getparent()
+                previous = el.getprevious()
+                if previous is not None:
+                    # The previous sibling is closed, so its tail text is complete
+                    if previous.tail:
+                        out.append(previous.tail)
+                    parent.remove(previous)
+                elif parent is not None:
+                    # First child: the parent's leading text is complete
+                    if parent.text and parent.tag not in NON_TEXT_TAGS:
+                        out.append(parent.text)
+                    parent.text = None
+            else:
+                if el.text and el.tag not in NON_TEXT_TAGS:
+                    out.append(el.text)
+                if len(el) and el[-1].tail:
+                    out.append(el[-1].tail)
+                del el[:]
+                el.text = None
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        handle_events()
+    parser.close()
+    handle_events()
+    return "\n".join(out)
+
+def clean_10k_text(text):
+    """Collapse whitespace and drop page furniture so prompts carry fewer tokens."""
+    text = HORIZONTAL_SPACE.sub(" ", text)
+    text = BOILERPLATE_LINE.sub("", text)
+    text = BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
 def extract_sections(text):
     """
     Extract major narrative sections from a 10-K filing using regex.
     Returns a dictionary with section names and full text.
     """
     sections = {}
-    
-    patterns = [
-        (r"item\s+1[.\s]+business", "Business", r"item\s+1a"),
-        (r"item\s+1a[.\s]+risk\s+factors", "Risk Factors", r"item\s+1b"),
-        (r"item\s+7[.\s]+management|item\s+7[.\s]+md&a", "Management's Discussion and Analysis", r"item\s+7a|item\s+8"),
-        (r"item\s+7a[.\s]+quantitative", "Quantitative and Qualitative Disclosures", r"item\s+8"),
-        (r"item\s+8[.\s]+financial", "Financial Statements", r"item\s+9"),
-    ]
-    
-    for start_pattern, name, end_pattern in patterns:
-        # Find all matches of the start pattern
-        matches = list(re.finditer(start_pattern, text, re.IGNORECASE))
-        if not matches:
+
+    # Match case-sensitively against a lower-cased copy instead of case-folding
+    # during the scan. Offsets only carry over if lowering kept every
+    # character in place; otherwise scan the original text case-insensitively.
+    haystack = text.lower()
+    markers = SECTION_MARKERS
+    if len(haystack) != len(text):
+        haystack, markers = text, SECTION_MARKERS_ANY_CASE
+
+    # One scan over the filing: remember where every item marker occurs and
+    # the *last* position of each section heading (skips TOC, grabs real body)
+    item_offsets = {}
+    heading_offsets = {}
+    for match in markers.finditer(haystack):
+        item = match.group(1).lower()
+        item_offsets.setdefault(item, []).append(match.start())
+        if match.lastindex > 1:
+            heading_offsets[(item, match.lastindex)] = match.start()
+
+    for name, item, title, end_items in SECTIONS:
+        start = heading_offsets.get((item, title))
+        if start is None:
             print(f"⚠ Section not found: {name}")
             continue
-        
-        # Use the *last* match (skips TOC, grabs real section body)
-        start = matches[-1].start()
-        
-        end_match = re.search(end_pattern, text[start:], re.IGNORECASE)
-        end = start + end_match.start() if end_match else len(text)
-        
+
+        # Section runs until the first end marker after its heading
+        end = len(text)
+        for end_item in end_items:
+            offsets = item_offsets.get(end_item, [])
+            i = bisect.bisect_right(offsets, start)
+            if i < len(offsets):
+                end = min(end, offsets[i])
+
         section_text = text[start:end].strip()
         sections[name] = section_text
     
     return sections
 
-def analyze_with_gemini(section_name, section_text):
-    """Send section text to Gemini for summarization."""
-    # Truncate to avoid huge API payloads and timeouts
-    MAX_TEXT_LENGTH = 100000
-    truncated_text = section_text[:MAX_TEXT_LENGTH]
-    if len(section_text) > MAX_TEXT_LENGTH:
+# Recently used section dicts, kept in memory in front of the disk cache.
+# A single filing's sections can run to several MB of text, so the tier is
+# bounded by total characters held per worker rather than by entry count.
+SECTIONS_MEMORY_CHARS = 4_000_000
+_sections_memory = OrderedDict()
+_sections_memory_chars = 0
+_sections_memory_lock = threading.Lock()
+
+def get_10k_sections(url):
+    """
+    Return the extracted sections for a 10-K, or None if it can't be fetched.
+    Filings never change, so results are keyed by the archive URL (like the
+    10-K text cache) and repeat lookups skip both the regex scan and reading
+    the multi-MB filing text back from disk.
+    """
+    key = cache_key("sections", url)
+    with _sections_memory_lock:
+        sections = _sections_memory.get(key)
+        if sections is not None:
+            _sections_memory.move_to_end(key)
+            return sections
+
+    sections = cache.get(key)
+    if sections is None:
+        text = fetch_10k_text(url)
+        if not text:
+            return None
+        sections = extract_sections(text)
+        cache.set(key, sections)
+
+    size = sum(len(body) for body in sections.values())
+    if size > SECTIONS_MEMORY_CHARS:
+        return sections
+
+    global _sections_memory_chars
+    with _sections_memory_lock:
+        if key not in _sections_memory:
+            _sections_memory[key] = sections
+            _sections_memory_chars += size
+        _sections_memory.move_to_end(key)
+        while _sections_memory_chars > SECTIONS_MEMORY_CHARS:
+            _, evicted = _sections_memory.popitem(last=False)
+            _sections_memory_chars -= sum(len(body) for body in evicted.values())
+    return sections
+
+# Shared generation settings. Output length dominates Gemini latency, so the
+# visible summary is capped at ~800 tokens; Gemini 2.5 counts thinking tokens
+# against max_output_tokens, so the thinking budget is added on top.
+MAX_SUMMARY_TOKENS = 800
+THINKING_BUDGET = 1024
+GEMINI_SYSTEM_INSTRUCTION = (
+    "You are an expert investment analyst reading SEC 10-K filings. "
+    "Answer in terse bullets under short headings, with no preamble or "
+    "restating of the task, and quote figures exactly as filed."
+)
+
+def get_gemini():
+    """Return the shared (client, generation config), importing google-genai on first use."""
+    global _gemini_client, _gemini_config
+    if _gemini_client is None:
+        with _gemini_lock:
+            if _gemini_client is None:
+                from google import genai
+                from google.genai import types
+
+                _gemini_config = types.GenerateContentConfig(
+                    system_instruction=GEMINI_SYSTEM_INSTRUCTION,
+                    max_output_tokens=MAX_SUMMARY_TOKENS + THINKING_BUDGET,
+                    temperature=0.2,
+                    thinking_config=types.ThinkingConfig(thinking_budget=THINKING_BUDGET),
+                )
+                _gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+    return _gemini_client, _gemini_config
+
+# Per-section prompt templates, built once at import
+PROMPT_TEMPLATES = {
+    "business": (
+        "Focus: business model, market position, and competitive advantages.\n\n"
+        "Section: {section_name}\n\n{section_text}\n\n"
+        "Tasks:\n"
+        "- Explain the business model and primary revenue drivers.\n"
+        "- Identify signs of durable competitive advantage (moat).\n"
+        "- Note material data gaps and where to look next.\n"
+        "Deliverable: Concise memo (bulleted, 6-10 bullets)."
+    ),
+    "risk factors": (
+        "Section: {section_name}\n\n{section_text}\n\n"
+        "Tasks:\n"
+        "- Extract and summarize top 5 material risks with likelihood/impact.\n"
+        "- Flag any qualitative language that obscures magnitude.\n"
+        "Deliverable: Ranked risk list with short rationale."
+    ),
+    "management's discussion and analysis": (
+        "Section: {section_name}\n\n{section_text}\n\n"
+        "Tasks:\n"
+        "- Pull out key operating metrics, trends, and management tone.\n"
+        "- Assess disclosures for transparency and conservative accounting.\n"
+        "Deliverable: MD&A summary (at most 10 bullets) with citations to named disclosures."
+    ),
+    "quantitative and qualitative disclosures": (
+        "Section: {section_name}\n\n{section_text}\n\n"
+        "Tasks:\n"
+        "- Identify material quantitative disclosures and reconcile to narrative.\n"
+        "- Call out rounding, restatements, or discrepancies.\n"
+        "Deliverable: Short reconciled data checklist."
+    ),
+    "financial statements": (
+        "Section: {section_name}\n\n{section_text}\n\n"
+        "Tasks:\n"
+        "- Give the headline figures from the income statement, balance sheet, and cash flow statement.\n"
+        "- Compute free cash flow (operating cash flow less capex) and give a rough valuation range; state assumptions, not workings.\n"
+        "Deliverable: At most 10 bullets with figures, then one valuation-range line."
+    ),
+}
+
+# Fallback to a general Buffett-style analytic prompt
+DEFAULT_PROMPT_TEMPLATE = (
+    "Take a Berkshire Hathaway investor's view.\n\nSection: {section_name}\n\n{section_text}\n\n"
+    "Tasks: Identify moat, management quality, cashflow durability, and valuation.\n"
+    "Deliverable: Bulleted memo (at most 10 bullets)."
+)
+
+# Lightweight model selection per section (defaults to the flash model)
+MODEL_MAP = {
+    "financial statements": "gemini-2.5-flash",
+    "management's discussion and analysis": "gemini-2.5-flash",
+    "risk factors": "gemini-2.5-flash",
+    "business": "gemini-2.5-flash",
+    "quantitative and qualitative disclosures": "gemini-2.5-flash",
+}
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# Truncate to roughly 6k input tokens (~4 characters per token) to keep
+# prompt processing fast and avoid huge API payloads
+MAX_TEXT_LENGTH = 6000 * 4
+
+def build_gemini_request(section_name, section_text, max_length=MAX_TEXT_LENGTH):
+    """Build the (model, prompt) pair used to summarize a section."""
+    truncated_text = section_text[:max_length]
+    if len(section_text) > max_length:
         truncated_text += f"\n\n[Text truncated - original length: {len(section_text)} characters]"
 
-    # Per-section prompt templates and (optional) model choices
     section_key = (section_name or "").lower()
+    template = PROMPT_TEMPLATES.get(section_key, DEFAULT_PROMPT_TEMPLATE)
+    prompt = template.format(section_name=section_name, section_text=truncated_text)
+    model = MODEL_MAP.get(section_key, DEFAULT_MODEL)
+    return model, prompt
 
-    prompt_templates = {
-        "business": (
-            "You are an equity analyst focusing on business model, market position, "
-            "and competitive advantages.\n\nSection: {section_name}\n\n{section_text}\n\n"
-            "Tasks:\n"
-            "- Explain the business model and primary revenue drivers.\n"
-            "- Identify signs of durable competitive advantage (moat).\n"
-            "- Note material data gaps and where to look next.\n"
-            "Deliverable: Concise memo (bulleted, 6-10 bullets)."
-        ),
-        "risk factors": (
-            "You are a risk analyst.\n\nSection: {section_name}\n\n{section_text}\n\n"
-            "Tasks:\n"
-            "- Extract and summarize top 5 material risks with likelihood/impact.\n"
-            "- Flag any qualitative language that obscures magnitude.\n"
-            "Deliverable: Ranked risk list with short rationale."
-        ),
-        "management's discussion and analysis": (
-            "You are a financial analyst focused on management commentary.\n\nSection: {section_name}\n\n{section_text}\n\n"
-            "Tasks:\n"
-            "- Pull out key operating metrics, trends, and management tone.\n"
-            "- Assess disclosures for transparency and conservative accounting.\n"
-            "Deliverable: MD&A summary with citations to named disclosures."
-        ),
-        "quantitative and qualitative disclosures": (
-            "You are a numbers-focused analyst.\n\nSection: {section_name}\n\n{section_text}\n\n"
-            "Tasks:\n"
-            "- Identify material quantitative disclosures and reconcile to narrative.\n"
-            "- Call out rounding, restatements, or discrepancies.\n"
-            "Deliverable: Short reconciled data checklist."
-        ),
-        "financial statements": (
-            "You are an accounting and valuation analyst.\n\nSection: {section_name}\n\n{section_text}\n\n"
-            "Tasks:\n"
-            "- Summarize income statement, balance sheet, cash flow highlights.\n"
-            "- Extract free cash flow and perform a quick sanity DCF.\n"
-            "Deliverable: Key financials + headline valuation range."
-        ),
-        "combined": (
-            "You are a senior investor synthesizing Business, Risks, and MD&A.\n\nSection: {section_name}\n\n{section_text}\n\n"
-            "Tasks:\n"
-            "- Produce an integrated moat & durability memo in Buffett style.\n"
-            "- Provide one suggested follow-up question and critical citations.\n"
-            "Deliverable: 1-page investor memo."
-        ),
-    }
-
-    # Lightweight model selection per section (defaults to the flash model)
-    model_map = {
-        "financial statements": "gemini-2.5-flash",
-        "combined": "gemini-2.5-flash",
-        "management's discussion and analysis": "gemini-2.5-flash",
-        "risk factors": "gemini-2.5-flash",
-        "business": "gemini-2.5-flash",
-        "quantitative and qualitative disclosures": "gemini-2.5-flash",
-    }
-
-    template = prompt_templates.get(section_key, None)
-    if template:
-        prompt = template.format(section_name=section_name, section_text=truncated_text)
-    else:
-        # Fallback to a general Buffett-style analytic prompt
-        prompt = (
-            f"You are a Berkshire-style analyst.\nSection: {section_name}\n\n{truncated_text}\n\n"
-            "Tasks: Identify moat, management quality, cashflow durability, and valuation.\n"
-            "Deliverable: Bulleted memo."
-        )
+# Appended when Gemini stops at max_output_tokens; such summaries aren't cached
+TRUNCATED_NOTE = "\n\n[Summary cut off at the output length limit]"
+
+def hit_token_limit(response):
+    """Return True if Gemini stopped generating because it hit max_output_tokens."""
+    candidates = getattr(response, "candidates", None) or []
+    return any(candidate.finish_reason == "MAX_TOKENS" for candidate in candidates)
+
+def stream_with_gemini(section_name, section_text):
+    """Send section text to Gemini and yield the summary as it is generated."""
+    model, prompt = build_gemini_request(section_name, section_text)
+    key = cache_key("gemini", model, prompt)
+    summary = cache.get(key)
+    if summary is not None:
+        yield summary
+        return
+
+    chunks = []
+    truncated = False
+    try:
+        client, config = get_gemini()
+        for chunk in client.models.generate_content_stream(
+            model=model,
+            config=config,
+            contents=prompt
+        ):
+            if chunk.text:
+                chunks.append(chunk.text)
+                yield chunk.text
+            truncated = truncated or hit_token_limit(chunk)
+    except Exception as e:
+        logger.error(f"Gemini API error for section '{section_name}': {e}")
+        raise
 
-    model = model_map.get(section_key, "gemini-2.5-flash")
+    if truncated:
+        logger.warning(f"Gemini summary for section '{section_name}' hit the output token limit")
+        if chunks:
+            yield TRUNCATED_NOTE
+    elif chunks:
+        cache.set(key, "".join(chunks))
+
+def analyze_with_gemini(section_name, section_text, max_length=MAX_TEXT_LENGTH):
+    """Send section text to Gemini without streaming and return the summary."""
+    model, prompt = build_gemini_request(section_name, section_text, max_length)
+    key = cache_key("gemini", model, prompt)
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
 
     try:
+        client, config = get_gemini()
         response = client.models.generate_content(
             model=model,
-            config=types.GenerateContentConfig(system_instruction="You are an expert investment analyst."),
+            config=config,
             contents=prompt
         )
-        # `response.text` is used elsewhere in the file; preserve that interface
-        return getattr(response, "text", None) or str(response)
+        summary = response.text
+        if not summary:
+            # Blocked or empty responses carry no text; don't cache them
+            logger.warning(f"Gemini returned no text for section '{section_name}'")
+            return None
+        if hit_token_limit(response):
+            logger.warning(f"Gemini summary for section '{section_name}' hit the output token limit")
+            return summary + TRUNCATED_NOTE
+        cache.set(key, summary)
+        return summary
     except Exception as e:
         logger.error(f"Gemini API error for section '{section_name}': {e}")
         raise
 
+def analyze_combined(section_keys, sections):
+    """
+    Summarize several sections with one Gemini call each, run in parallel,
+    and stitch the results together under per-section headers. The parts
+    share a single prompt's text budget, so the combined view sends no more
+    filing text than one section does. Sections Gemini returned nothing
+    for are left out; an empty string means none came back.
+    """
+    budget = MAX_TEXT_LENGTH // len(section_keys)
+    futures = [
+        executor.submit(analyze_with_gemini, key, sections[key], budget)
+        for key in section_keys
+    ]
+    summaries = [future.result() for future in futures]
+    return "\n\n".join(
+        f"{key.title()}\n\n{summary}"
+        for key, summary in zip(section_keys, summaries)
+        if summary
+    )
+
+def sse_events(chunks):
+    """Wrap summary text chunks as server-sent events for the browser."""
+    received = False
+    try:
+        for chunk in chunks:
+            received = True
+            yield f"data: {json.dumps({'delta': chunk})}\n\n"
+    except Exception as e:
+        logger.error(f"Error streaming summary: {e}")
+        received = False
+    if not received:
+        yield f"data: {json.dumps({'error': 'Failed to generate summary'})}\n\n"
+        return
+    yield f"data: {json.dumps({'done': True})}\n\n"
+
 @app.route("/")
 def home():
     return render_template("index.html")
@@ -219,47 +606,48 @@ def analyze_10k(ticker, section):
         url = get_latest_10k_url(cik)
         if not url:
             return jsonify({"error": "No 10-K found"}), 404
-        text = fetch_10k_text(url)
-        if not text:
+        sections = get_10k_sections(url)
+        if sections is None:
             return jsonify({"error": "Failed to fetch 10-K content"}), 500
-        
-        sections = extract_sections(text)
 
         # Normalize keys for lookup
         normalized_sections = {k.lower(): v for k, v in sections.items()}
 
-        # Build a combined section of Business + Risk Factors + MD&A
+        # The combined view covers Business + Risk Factors + MD&A, each
+        # summarized by its own Gemini call so they can run in parallel
         combined_order = [
             "business",
             "risk factors",
             "management's discussion and analysis"
         ]
-        combined_parts = []
-        for key in combined_order:
-            if key in normalized_sections:
-                # add a clear header before each part
-                header = key.title()
-                combined_parts.append(f"{header}\n\n{normalized_sections[key]}")
-
-        if combined_parts:
-            normalized_sections["combined"] = "\n\n".join(combined_parts)
+        combined_keys = [key for key in combined_order if key in normalized_sections]
 
         print(f"✓ Found sections: {list(normalized_sections.keys())}")
         section_key = section.lower()
 
-        if section_key not in normalized_sections:
+        if section_key == "combined" and combined_keys:
+            summary = analyze_combined(combined_keys, normalized_sections)
+            if not summary:
+                return jsonify({"error": "Failed to generate summary"}), 500
+            chunks = [summary]
+        elif section_key in normalized_sections:
+            chunks = stream_with_gemini(section, normalized_sections[section_key])
+        else:
             return jsonify({"error": f"Section {section} not found"}), 404
 
-        summary = analyze_with_gemini(section, normalized_sections[section_key])
-        if not summary:
-            return jsonify({"error": "Failed to generate summary"}), 500
-
-        # Return summary only (TTS disabled)
-        return jsonify({"ticker": ticker, "section": section, "summary": summary})
+        # Stream the summary as server-sent events (TTS disabled)
+        return Response(
+            stream_with_context(sse_events(chunks)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     except Exception as e:
         logger.error(f"Error in analyze_10k: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == "__main__":
+    # Warm the ticker map so the first request skips that round-trip; under
+    # gunicorn, gunicorn.conf.py does this once each worker has started
+    schedule_ticker_map_refresh()
     app.run(debug=True)
\ No newline at end of file
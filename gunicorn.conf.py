@@ -0,0 +1,8 @@
+# Gunicorn reads this file from the working directory on startup; settings
+# passed on the command line (Procfile, start.sh, start.bat) still apply.
+
+
+def post_worker_init(worker):
+    """Warm the SEC ticker map in each worker so its first request skips the download."""
+    import buffett_app
+    buffett_app.schedule_ticker_map_refresh()
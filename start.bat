@@ -6,7 +6,7 @@ REM Activate virtual environment
 call venv\Scripts\activate.bat
 
 REM Start Gunicorn
-gunicorn --workers 4 --bind 0.0.0.0:8000 --timeout 120 buffett_app:app
+gunicorn --workers 4 --worker-class gthread --threads 16 --bind 0.0.0.0:8000 --timeout 120 buffett_app:app
 
 REM Notes:
 REM - Open browser to http://localhost:8000
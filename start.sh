@@ -8,6 +8,8 @@ source venv/bin/activate
 # Start Gunicorn with production settings
 gunicorn \
   --workers 4 \
+  --worker-class gthread \
+  --threads 16 \
   --bind 0.0.0.0:8000 \
   --timeout 120 \
   --access-logfile /var/log/buffett_access.log \
@@ -17,6 +19,8 @@ gunicorn \
 
 # Notes:
 # - --workers: number of worker processes (adjust based on CPU cores)
+# - --threads: concurrent requests per worker; requests mostly wait on SEC and
+#   Gemini I/O (and stream summaries), so one thread per in-flight request
 # - --bind: IP and port to listen on
 # - --timeout: request timeout in seconds (TTS can take time)
 # - --log-level: set to 'debug' if troubleshooting